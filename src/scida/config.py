@@ -2,15 +2,29 @@
 Configuration handling.
 """
 
+import copy
 import importlib.resources
 import os
 import pathlib
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import yaml
 
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:  # libyaml bindings not available
+    from yaml import SafeLoader as _YamlLoader
+
 _conf = dict()
 
+# parsed YAML files keyed by absolute path, invalidated by modification time
+_file_cache: Dict[str, Tuple[int, Dict]] = {}
+# parsed YAML package resources keyed by (package, resource name)
+_resource_cache: Dict[Tuple[str, str], Dict] = {}
+
+# user configuration directory, resolved once at import
+_path_confdir = os.path.join(os.path.expanduser("~"), ".config/scida")
+
 
 def _access_confdir() -> str:
     """
@@ -22,8 +36,7 @@ def _access_confdir() -> str:
     str
         The path to the configuration directory.
     """
-    path_user = os.path.expanduser("~")
-    path_confdir = os.path.join(path_user, ".config/scida")
+    path_confdir = _path_confdir
     path_conf = os.path.join(path_confdir, "config.yaml")
     if not os.path.exists(path_conf):
         copy_defaultconfig(overwrite=False)
@@ -47,11 +60,12 @@ def get_config(reload: bool = False, update_global=True) -> dict:
         The configuration dictionary.
     """
     global _conf
+    if not reload and len(_conf) > 0:
+        return _conf
     prefix = "SCIDA_"
+    plen = len(prefix)
     envconf = {
-        k.replace(prefix, "").lower(): v
-        for k, v in os.environ.items()
-        if k.startswith(prefix)
+        k[plen:].lower(): v for k, v in os.environ.items() if k.startswith(prefix)
     }
 
     # in any case, we make sure that there is some config in the default path.
@@ -62,8 +76,6 @@ def get_config(reload: bool = False, update_global=True) -> dict:
     path = envconf.pop("config_path", None)
     if path is None:
         path = path_conf
-    if not reload and len(_conf) > 0:
-        return _conf
     config = get_config_fromfile(path)
     if config.get("copied_default", False):
         print(
@@ -183,8 +195,7 @@ def copy_defaultconfig(overwrite=False) -> None:
     None
     """
 
-    path_user = os.path.expanduser("~")
-    path_confdir = os.path.join(path_user, ".config/scida")
+    path_confdir = _path_confdir
     if not os.path.exists(path_confdir):
         os.makedirs(path_confdir, exist_ok=True)
     path_conf = os.path.join(path_confdir, "config.yaml")
@@ -197,6 +208,33 @@ def copy_defaultconfig(overwrite=False) -> None:
                 newfile.write(content)
 
 
+def _load_yaml_file(path: str) -> Dict:
+    """
+    Load a YAML file, using a cached result if the file has not changed since.
+
+    Parameters
+    ----------
+    path: str
+        Path to the YAML file.
+
+    Returns
+    -------
+    dict
+        The cached parsed YAML content, which must not be modified.
+    """
+    path = os.path.abspath(path)
+    mtime = os.stat(path).st_mtime_ns
+    cached = _file_cache.get(path)
+    if cached is None or cached[0] != mtime:
+        # read in one go; libyaml scans a contiguous buffer faster than a text stream
+        with open(path, "rb") as file:
+            data = file.read()
+        conf = yaml.load(data, Loader=_YamlLoader)
+        cached = (mtime, conf)
+        _file_cache[path] = cached
+    return cached[1]
+
+
 def get_config_fromfile(resource: str) -> Dict:
     """
     Load config from a YAML file.
@@ -211,30 +249,49 @@ def get_config_fromfile(resource: str) -> Dict:
     """
     if resource == "":
         raise ValueError("Config name cannot be empty.")
+    # callers may modify the returned config (e.g. when merging), so hand out a copy
+    return copy.deepcopy(_get_config_fromfile_cached(resource))
+
+
+def _get_config_fromfile_cached(resource: str) -> Dict:
+    """
+    Load config from a YAML file, see get_config_fromfile.
+    The returned dictionary is shared between calls and must not be modified.
+
+    Parameters
+    ----------
+    resource
+        The name of the resource or file path.
+
+    Returns
+    -------
+    dict
+    """
     # order (in descending order of priority):
     # 1. absolute path?
-    path = os.path.expanduser(resource)
+    path = resource
+    if not os.path.isabs(path):
+        path = os.path.expanduser(path)
     if os.path.isabs(path):
-        with open(path, "r") as file:
-            conf = yaml.safe_load(file)
-        return conf
+        return _load_yaml_file(path)
     # 2. non-absolute path?
     # 2.1. check ~/.config/scida/
-    bpath = os.path.expanduser("~/.config/scida")
-    path = os.path.join(bpath, resource)
+    path = os.path.join(_path_confdir, resource)
     if os.path.isfile(path):
-        with open(path, "r") as file:
-            conf = yaml.safe_load(file)
-        return conf
+        return _load_yaml_file(path)
     # 2.2 check scida package resources
     resource_path = "scida.configfiles"
     resource_elements = resource.split("/")
     rname = resource_elements[-1]
     if len(resource_elements) > 1:
         resource_path += "." + ".".join(resource_elements[:-1])
-    with importlib.resources.path(resource_path, rname) as fp:
-        with open(fp, "r") as file:
-            conf = yaml.safe_load(file)
+    key = (resource_path, rname)
+    conf = _resource_cache.get(key)
+    if conf is None:
+        # package resources do not change at runtime, so parse them only once
+        data = importlib.resources.files(resource_path).joinpath(rname).read_bytes()
+        conf = yaml.load(data, Loader=_YamlLoader)
+        _resource_cache[key] = conf
     return conf
 
 
@@ -266,29 +323,30 @@ def merge_dicts_recursively(
     -------
     dict
     """
-    if path is None:
-        path = []
-    for key in dict_b:
-        if key in dict_a:
+    # iterate with an explicit stack of (dict_a, items of dict_b, path) rather than
+    # recursing; a sub-dictionary is merged completely before continuing with its
+    # siblings, so that the merge order (and the first conflict reported) is depth-first
+    stack = [(dict_a, iter(dict_b.items()), tuple(path) if path is not None else ())]
+    while stack:
+        node_a, items_b, dpath = stack[-1]
+        for key, vb in items_b:
+            if key not in node_a:
+                node_a[key] = vb
+                continue
+            va = node_a[key]
             if mergefunc_keys is not None:
-                dict_a[key] = mergefunc_keys(dict_a[key], dict_b[key])
-            elif isinstance(dict_a[key], dict) and isinstance(dict_b[key], dict):
-                merge_dicts_recursively(
-                    dict_a[key],
-                    dict_b[key],
-                    path + [str(key)],
-                    mergefunc_keys=mergefunc_keys,
-                    mergefunc_values=mergefunc_values,
-                )
-            elif dict_a[key] == dict_b[key]:
+                node_a[key] = mergefunc_keys(va, vb)
+            elif isinstance(va, dict) and isinstance(vb, dict):
+                stack.append((va, iter(vb.items()), dpath + (str(key),)))
+                break
+            elif va == vb:
                 pass  # same leaf value
+            elif mergefunc_values is not None:
+                node_a[key] = mergefunc_values(va, vb)
             else:
-                if mergefunc_values is not None:
-                    dict_a[key] = mergefunc_values(dict_a[key], dict_b[key])
-                else:
-                    raise Exception("Conflict at %s" % ".".join(path + [str(key)]))
+                raise Exception("Conflict at %s" % ".".join(dpath + (str(key),)))
         else:
-            dict_a[key] = dict_b[key]
+            stack.pop()  # all items of this level merged
     return dict_a
 
 
@@ -315,4 +373,8 @@ def get_config_fromfiles(paths: List[str], subconf_keys: Optional[List[str]] = N
     return conf
 
 
-_config = get_config()
+def __getattr__(name):
+    # "_config" used to be loaded at import time; now only load it when requested
+    if name == "_config":
+        return get_config()
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
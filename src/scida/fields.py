@@ -4,8 +4,11 @@
 
 from __future__ import annotations
 
+import copy
 import inspect
 import logging
+import math
+import re
 from collections.abc import MutableMapping
 from enum import Enum
 from typing import Dict, Optional
@@ -18,6 +21,9 @@ from scida.helpers_misc import get_kwargs, sprint
 
 log = logging.getLogger(__name__)
 
+# splits a trailing numeric index from a field name, e.g. "Coordinates0"
+_SUFFIX_RE = re.compile(r"^(.+?)(\d+)$")
+
 
 class FieldType(Enum):
     """
@@ -34,6 +40,9 @@ class FieldRecipe(object):
     Recipe for a field.
     """
 
+    # recipes exist for every field, so avoid a per-instance __dict__
+    __slots__ = ("type", "name", "description", "units", "func", "arr")
+
     def __init__(
         self, name, func=None, arr=None, description="", units=None, ftype=FieldType.IO
     ):
@@ -70,6 +79,14 @@ class DerivedFieldRecipe(FieldRecipe):
     Recipe for a derived field.
     """
 
+    __slots__ = (
+        "_spec",
+        "_func_kwargs",
+        "_accept_kwargs",
+        "_none_default_kwargs",
+        "_args_set",
+    )
+
     def __init__(self, name, func, description="", units=None):
         """See FieldRecipe for parameters."""
         super().__init__(
@@ -79,6 +96,14 @@ class DerivedFieldRecipe(FieldRecipe):
             units=units,
             ftype=FieldType.DERIVED,
         )
+        # introspect the function once here rather than on every instantiation
+        self._spec = inspect.getfullargspec(func)
+        self._func_kwargs = get_kwargs(func)
+        self._accept_kwargs = self._spec.varkw is not None
+        self._none_default_kwargs = frozenset(
+            k for k, v in self._func_kwargs.items() if v is None
+        )
+        self._args_set = frozenset(self._spec.args)
 
 
 class FieldContainer(MutableMapping):
@@ -125,6 +150,8 @@ class FieldContainer(MutableMapping):
         self._fields.update(*args, **kwargs)
         self._fieldrecipes = {}
         self._fieldlength = None
+        # cached results of keys() for given arguments, reset on any change of keys
+        self._keys_cache: Dict[tuple, list] = {}
         self.fieldrecipes_kwargs = fieldrecipes_kwargs
         self.withunits = withunits
         self._ureg: Optional[pint.UnitRegistry] = ureg
@@ -240,17 +267,17 @@ class FieldContainer(MutableMapping):
         if not isinstance(collection, FieldContainer):
             raise TypeError("Can only merge FieldContainers.")
         # TODO: support nested containers
-        for k in collection._containers:
-            if k not in self._containers:
+        for k, other in collection._containers.items():
+            own = self._containers.get(k)
+            if own is None:
                 continue
             if overwrite:
-                c1 = self._containers[k]
-                c2 = collection._containers[k]
+                c1, c2 = own, other
             else:
-                c1 = collection._containers[k]
-                c2 = self._containers[k]
-            c1._fields.update(**c2._fields)
-            c1._fieldrecipes.update(**c2._fieldrecipes)
+                c1, c2 = other, own
+            c1._fields.update(c2._fields)
+            c1._fieldrecipes.update(c2._fieldrecipes)
+            c1._invalidate_keys_cache()
 
     @property
     def fieldcount(self):
@@ -278,20 +305,21 @@ class FieldContainer(MutableMapping):
         """
         if self._fieldlength is not None:
             return self._fieldlength
-        fvals = self._fields.values()
-        itr = iter(fvals)
-        if len(fvals) == 0:
+        itr = iter(self._fields.values())
+        first = next(itr, None)
+        if first is None:
             # can we infer from recipes?
             if len(self._fieldrecipes) > 0:
                 # get first recipe
                 name = next(iter(self._fieldrecipes.keys()))
                 first = self._getitem(name, evaluate_recipe=True)
+                itr = iter(())
             else:
                 return None
-        else:
-            first = next(itr)
-        if all(first.shape[0] == v.shape[0] for v in self._fields.values()):
-            self._fieldlength = first.shape[0]
+        n = first.shape[0]
+        # remaining fields (if any) need to agree with the first one
+        if all(v.shape[0] == n for v in itr):
+            self._fieldlength = n
             return self._fieldlength
         else:
             return None
@@ -321,21 +349,61 @@ class FieldContainer(MutableMapping):
         -------
 
         """
-        fieldkeys = []
-        recipekeys = []
+        return list(
+            self._keys_cached(
+                withgroups=withgroups,
+                withrecipes=withrecipes,
+                withinternal=withinternal,
+                withfields=withfields,
+            )
+        )
+
+    def _keys_cached(
+        self,
+        withgroups: bool = True,
+        withrecipes: bool = True,
+        withinternal: bool = False,
+        withfields: bool = True,
+    ) -> list:
+        """
+        Return the cached list of keys in the container. See keys() for parameters.
+        The returned list is shared and must not be modified.
+
+        Returns
+        -------
+        list
+        """
+        cachekey = (withgroups, withrecipes, withinternal, withfields)
+        if not withinternal:
+            # internals is a public list that may change without resetting the cache
+            cachekey += tuple(self.internals)
+        cached = self._keys_cache.get(cachekey)
+        if cached is not None:
+            return cached
+        # set operations directly on the dict views avoid intermediate sets/lists
+        keys = set()
         if withfields:
-            fieldkeys = list(self._fields.keys())
-            if not withinternal:
-                for ikey in self.internals:
-                    if ikey in fieldkeys:
-                        fieldkeys.remove(ikey)
+            if withinternal:
+                keys |= self._fields.keys()
+            else:
+                keys |= self._fields.keys() - self.internals
         if withrecipes:
-            recipekeys = self._fieldrecipes.keys()
-        fieldkeys = list(set(fieldkeys) | set(recipekeys))
+            keys |= self._fieldrecipes.keys()
         if withgroups:
-            groupkeys = self._containers.keys()
-            fieldkeys = list(set(fieldkeys) | set(groupkeys))
-        return sorted(fieldkeys)
+            keys |= self._containers.keys()
+        keys = sorted(keys)
+        self._keys_cache[cachekey] = keys
+        return keys
+
+    def _invalidate_keys_cache(self):
+        """
+        Reset the cached results of keys(). Needs to be called whenever keys are added or removed.
+
+        Returns
+        -------
+        None
+        """
+        self._keys_cache.clear()
 
     def items(self, withrecipes=True, withfields=True, evaluate=True):
         """
@@ -404,15 +472,14 @@ class FieldContainer(MutableMapping):
         """
         # we only construct field upon first call to it (default)
         # if to_containers, we register to the respective children containers
-        containers = []
         if isinstance(containernames, list):
-            containers = [self._containers[c] for c in containernames]
+            containers = tuple(map(self._containers.__getitem__, containernames))
         elif containernames == "all":
-            containers = self._containers.values()
+            containers = tuple(self._containers.values())
         elif containernames is None:
-            containers = [self]
+            containers = (self,)
         elif isinstance(containernames, str):  # just a single container as a string?
-            containers.append(self._containers[containernames])
+            containers = (self._containers[containernames],)
         else:
             raise ValueError("Unknown type.")
 
@@ -422,11 +489,14 @@ class FieldContainer(MutableMapping):
             """
             if name is None:
                 name = func.__name__
-            for container in containers:
-                drvfields = container._fieldrecipes
-                drvfields[name] = DerivedFieldRecipe(
-                    name, func, description=description, units=units
-                )
+            recipe = DerivedFieldRecipe(
+                name, func, description=description, units=units
+            )
+            for i, container in enumerate(containers):
+                # units are later set per container, so each container gets its own recipe;
+                # shallow copies share the function introspection done above
+                container._fieldrecipes[name] = recipe if i == 0 else copy.copy(recipe)
+                container._invalidate_keys_cache()
             return func
 
         return decorator
@@ -440,12 +510,22 @@ class FieldContainer(MutableMapping):
             self._fieldrecipes[key] = value
         else:
             self._fields[key] = value
+        self._invalidate_keys_cache()
 
     def __getitem__(self, key):
         return self._getitem(key)
 
     def __iter__(self):
-        return iter(self.keys())
+        # invalidation drops the cached list rather than modifying it, so no copy is needed
+        return iter(self._keys_cached())
+
+    def __contains__(self, key):
+        # check the underlying dicts rather than evaluating the entry via __getitem__
+        if key in self.aliases:
+            key = self.aliases[key]
+        return (
+            key in self._fields or key in self._fieldrecipes or key in self._containers
+        )
 
     def __repr__(self) -> str:
         """
@@ -487,20 +567,18 @@ class FieldContainer(MutableMapping):
         dd.DataFrame
         """
         dss = {}
+        keys = self.keys()
         if fields is None:
-            fields = self.keys()
+            fields = keys
+        keys = set(keys)
         for k in fields:
             idim = None
-            if k not in self.keys():
+            if k not in keys:
                 # could still be an index two 2D dataset
-                i = -1
-                while k[i:].isnumeric():
-                    i += -1
-                i += 1
-                if i == 0:
+                m = _SUFFIX_RE.match(k)
+                if m is None or m.group(1) not in self:
                     raise ValueError("Field '%s' not found" % k)
-                idim = int(k[i:])
-                k = k.split(k[i:])[0]
+                k, idim = m.group(1), int(m.group(2))
             v = self[k]
             assert v.ndim <= 2  # cannot support more than 2 here...
             if idim is not None:
@@ -517,13 +595,33 @@ class FieldContainer(MutableMapping):
                         dss[k + str(i)] = v[:, i]
             else:
                 dss[k] = v
-        dfs = []
+        # group columns by dtype, so that we can stack each group into a single array
+        # rather than constructing a dataframe per column (without upcasting dtypes)
+        dtypegroups = {}
+        singles = []
         for k, v in dss.items():
             if isinstance(v, pint.Quantity):
                 # pint quantities not supported yet in dd, so remove for now
                 v = v.magnitude
-            dfs.append(dd.from_dask_array(v, columns=[k]))
-        ddf = dd.concat(dfs, axis=1)
+                dss[k] = v
+            if math.isnan(v.shape[0]):
+                # unknown chunk sizes (e.g. after masking) cannot be stacked
+                singles.append([k])
+            else:
+                dtypegroups.setdefault(v.dtype, []).append(k)
+        dfs = []
+        for columns in list(dtypegroups.values()) + singles:
+            if len(columns) == 1:
+                arr = dss[columns[0]]
+            else:
+                arr = da.stack([dss[k] for k in columns], axis=1).rechunk({1: -1})
+            dfs.append(dd.from_dask_array(arr, columns=columns))
+        if len(dfs) == 1:
+            ddf = dfs[0]
+        else:
+            ddf = dd.concat(dfs, axis=1)
+        # restore requested column order
+        ddf = ddf[list(dss.keys())]
         return ddf
 
     def add_alias(self, alias, name):
@@ -559,6 +657,7 @@ class FieldContainer(MutableMapping):
         """
         if key in self._containers:
             del self._containers[key]
+            self._invalidate_keys_cache()
         else:
             raise KeyError("Unknown container '%s'" % key)
 
@@ -599,6 +698,7 @@ class FieldContainer(MutableMapping):
                 self._containers[name] = key
         else:
             raise ValueError("Unknown type.")
+        self._invalidate_keys_cache()
 
     def copy(self):
         """
@@ -617,6 +717,7 @@ class FieldContainer(MutableMapping):
         instance._ureg = self._ureg
         instance.internals = self.internals.copy()
         instance.parent = self.parent
+        instance._invalidate_keys_cache()
         for k, v in self._containers.items():
             instance.add_container(v.copy(), deep=True, name=k)
 
@@ -656,6 +757,7 @@ class FieldContainer(MutableMapping):
                 field = self._instantiate_field(key)
                 if update_dict:
                     self._fields[key] = field
+                    self._invalidate_keys_cache()
                 return field
             else:
                 raise KeyError("Unknown field '%s'" % key)
@@ -673,31 +775,21 @@ class FieldContainer(MutableMapping):
         -------
         da.Array
         """
-        func = self._fieldrecipes[key].func
-        units = self._fieldrecipes[key].units
-        accept_kwargs = inspect.getfullargspec(func).varkw is not None
-        func_kwargs = get_kwargs(func)
+        recipe = self._fieldrecipes[key]
+        func = recipe.func
+        units = recipe.units
         dkwargs = self.fieldrecipes_kwargs
         ureg = None
         if "ureg" not in dkwargs:
             ureg = self.get_ureg()
             dkwargs["ureg"] = ureg
         # first, we overwrite all optional arguments with class instance defaults where func kwarg is None
-        kwargs = {
-            k: dkwargs[k]
-            for k in (
-                set(dkwargs) & set([k for k, v in func_kwargs.items() if v is None])
-            )
-        }
+        none_default_kwargs = recipe._none_default_kwargs
+        kwargs = {k: v for k, v in dkwargs.items() if k in none_default_kwargs}
         # next, we add all optional arguments if func is accepting **kwargs and varname not yet in signature
-        if accept_kwargs:
-            kwargs.update(
-                **{
-                    k: v
-                    for k, v in dkwargs.items()
-                    if k not in inspect.getfullargspec(func).args
-                }
-            )
+        if recipe._accept_kwargs:
+            args_set = recipe._args_set
+            kwargs.update((k, v) for k, v in dkwargs.items() if k not in args_set)
         # finally, instantiate field
         field = func(self, **kwargs)
         if self.withunits and units is not None:
@@ -733,6 +825,7 @@ class FieldContainer(MutableMapping):
         return field
 
     def __delitem__(self, key):
+        self._invalidate_keys_cache()
         if key in self._fieldrecipes:
             del self._fieldrecipes[key]
         if key in self._containers:
@@ -743,7 +836,7 @@ class FieldContainer(MutableMapping):
             raise KeyError("Unknown key '%s'" % key)
 
     def __len__(self):
-        return len(self.keys())
+        return len(self._keys_cached())
 
     def get(self, key, value=None, allow_derived=True, force_derived=False):
         """
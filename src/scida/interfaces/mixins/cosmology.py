@@ -21,26 +21,49 @@ class CosmologyMixin(Mixin):
         Initialize a CosmologyMixin object. Requires _metadata_raw to be filled.
         """
         self.metadata = {}
+        self._cosmology = None
+        self._cosmology_params = None
         if hasattr(self, "_mixins"):
             self._mixins.append(self._mixin_name)
         else:
             self._mixins = [self._mixin_name]
         super().__init__(*args, **kwargs)
         metadata_raw = self._metadata_raw
-        c = get_cosmology_from_rawmetadata(metadata_raw)
-        self.cosmology = c
+        # the astropy cosmology object is only constructed upon first access
+        cparams = get_cosmology_params_from_rawmetadata(metadata_raw)
+        self._cosmology_params = cparams
         z = get_redshift_from_rawmetadata(metadata_raw)
         self.redshift = z
         self.metadata["redshift"] = self.redshift
         if hasattr(self, "ureg"):
             ureg = self.ureg
             with ignore_warn_redef(ureg):
-                if c is not None:
-                    ureg.define("h = %s" % str(c.h))
+                if cparams is not None:
+                    # same arithmetic as astropy's Cosmology.h (H0 / 100 km/s/Mpc)
+                    h = 100.0 * cparams["h"] / 100.0
+                    ureg.define("h = %s" % str(h))
                 if z is not None:
                     a = 1.0 / (1.0 + z)
                     ureg.define("a = %s" % str(float(a)))
 
+    @property
+    def cosmology(self):
+        """
+        Cosmology of the simulation, constructed from the raw metadata upon first access.
+
+        Returns
+        -------
+        Optional[astropy.cosmology.FlatLambdaCDM]
+        """
+        if self._cosmology is None and self._cosmology_params is not None:
+            self._cosmology = get_cosmology_from_params(**self._cosmology_params)
+        return self._cosmology
+
+    @cosmology.setter
+    def cosmology(self, value):
+        self._cosmology = value
+        self._cosmology_params = None
+
     def _info_custom(self):
         """
         Return a custom info string for this mixin object.
@@ -92,10 +115,52 @@ def get_cosmology_from_rawmetadata(metadata_raw):
     astropy.cosmology.Cosmology
         Defines a Flat Lambda CDM cosmology.
 
+    """
+    cparams = get_cosmology_params_from_rawmetadata(metadata_raw)
+    if cparams is None:
+        return None
+    return get_cosmology_from_params(**cparams)
+
+
+def get_cosmology_from_params(h, om0, ob0):
+    """
+    Construct a flat Lambda CDM cosmology.
+
+    Parameters
+    ----------
+    h: float
+        Dimensionless Hubble parameter.
+    om0: float
+        Matter density parameter today.
+    ob0: float
+        Baryon density parameter today.
+
+    Returns
+    -------
+    astropy.cosmology.FlatLambdaCDM
     """
     import astropy.units as u
     from astropy.cosmology import FlatLambdaCDM
 
+    hubble0 = 100.0 * h * u.km / u.s / u.Mpc
+    cosmology = FlatLambdaCDM(H0=hubble0, Om0=om0, Ob0=ob0)
+    return cosmology
+
+
+def get_cosmology_params_from_rawmetadata(metadata_raw):
+    """
+    Get the cosmological parameters from the raw metadata.
+
+    Parameters
+    ----------
+    metadata_raw: dict
+        Raw metadata.
+
+    Returns
+    -------
+    Optional[dict]
+        Values for "h", "om0" and "ob0", or None if the cosmology cannot be inferred.
+    """
     # gadgetstyle
     aliasdict = dict(
         h=["HubbleParam", "Cosmology:h"],
@@ -139,9 +204,4 @@ def get_cosmology_from_rawmetadata(metadata_raw):
             "No Omega baryon given, we will assume a value of '0.0486' for the cosmology."
         )
         ob0 = 0.0486
-    h = float(h)
-    om0 = float(om0)
-    ob0 = float(ob0)
-    hubble0 = 100.0 * h * u.km / u.s / u.Mpc
-    cosmology = FlatLambdaCDM(H0=hubble0, Om0=om0, Ob0=ob0)
-    return cosmology
+    return dict(h=float(h), om0=float(om0), ob0=float(ob0))
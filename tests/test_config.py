@@ -1,4 +1,14 @@
-from scida.config import get_config, get_config_fromfiles, get_simulationconfig
+import os
+
+import pytest
+
+from scida.config import (
+    get_config,
+    get_config_fromfile,
+    get_config_fromfiles,
+    get_simulationconfig,
+    merge_dicts_recursively,
+)
 
 
 def test_load_defaultconf():
@@ -15,6 +25,48 @@ def test_load_multiple_confs():
     assert "cache_path" in conf
 
 
+def test_config_fromfile_cache(tmp_path):
+    path = tmp_path / "test.yaml"
+    path.write_text("a:\n  b: 1\n")
+    conf = get_config_fromfile(str(path))
+    assert conf == {"a": {"b": 1}}
+    # modifying the returned dict must not affect later loads
+    conf["a"]["b"] = 2
+    assert get_config_fromfile(str(path)) == {"a": {"b": 1}}
+    # changes to the file are picked up
+    path.write_text("a:\n  b: 3\n")
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert get_config_fromfile(str(path)) == {"a": {"b": 3}}
+
+
+def test_merge_dicts_recursively():
+    a = {"a": {"b": 1, "c": {"d": 2}}, "e": 3}
+    b = {"a": {"c": {"f": 4}, "g": 5}, "e": 3, "h": 6}
+    res = merge_dicts_recursively(a, b)
+    assert res is a
+    assert a == {"a": {"b": 1, "c": {"d": 2, "f": 4}, "g": 5}, "e": 3, "h": 6}
+
+    # conflicts are reported depth-first, leaving the later keys untouched
+    a = {"a": {"d": 1}, "d": 1}
+    with pytest.raises(Exception, match="Conflict at a.d$"):
+        merge_dicts_recursively(a, {"a": {"d": 2}, "d": 2})
+
+    # mergefunc_values resolves leaf conflicts, still entering sub-dictionaries
+    a = {"a": {"b": 1, "c": 1}, "d": 1}
+    merge_dicts_recursively(
+        a, {"a": {"b": 2}, "d": 2}, mergefunc_values=lambda x, y: x + y
+    )
+    assert a == {"a": {"b": 3, "c": 1}, "d": 3}
+
+    # mergefunc_keys is applied to existing keys without entering sub-dictionaries
+    a = {"a": {"b": 1, "c": 1}, "d": 1}
+    merge_dicts_recursively(
+        a, {"a": {"b": 2}, "d": None}, mergefunc_keys=lambda x, y: x if y is None else y
+    )
+    assert a == {"a": {"b": 2}, "d": 1}
+
+
 def test_usersimconf(mocker):
     usersimconf = {"data": {"NewSim": dict()}}
     mocker.patch("scida.config._get_simulationconfig_user", return_value=usersimconf)
@@ -0,0 +1,46 @@
+from pint import UnitRegistry
+
+from scida.interfaces.mixins.cosmology import (
+    CosmologyMixin,
+    get_cosmology_from_params,
+    get_cosmology_params_from_rawmetadata,
+)
+
+metadata_raw = {
+    "/Header": {"HubbleParam": 0.6774, "Omega0": 0.3089, "OmegaBaryon": 0.0486}
+}
+
+
+class _Base:
+    def __init__(self, *args, **kwargs):
+        pass
+
+
+class DummyCosmologyDataset(CosmologyMixin, _Base):
+    def __init__(self, *args, **kwargs):
+        self._metadata_raw = metadata_raw
+        self.ureg = UnitRegistry()
+        super().__init__(*args, **kwargs)
+
+
+def test_cosmology_params():
+    params = get_cosmology_params_from_rawmetadata(metadata_raw)
+    assert params == dict(h=0.6774, om0=0.3089, ob0=0.0486)
+    assert all(isinstance(v, float) for v in params.values())
+    assert get_cosmology_params_from_rawmetadata({"/Header": {}}) is None
+
+
+def test_cosmology_lazy():
+    ds = DummyCosmologyDataset()
+    assert ds._cosmology is None  # not constructed yet
+    params = get_cosmology_params_from_rawmetadata(metadata_raw)
+    h_ureg = ds.ureg("h").to("dimensionless").magnitude
+    assert str(get_cosmology_from_params(**params).h) == str(h_ureg)
+    cosmology = ds.cosmology
+    assert cosmology is not None
+    assert str(cosmology.h) == str(h_ureg)
+    assert ds.cosmology is cosmology  # only constructed once
+
+    ds = DummyCosmologyDataset()
+    ds.cosmology = None
+    assert ds.cosmology is None
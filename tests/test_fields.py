@@ -1,4 +1,6 @@
 import dask.array as da
+import numpy as np
+import pint
 import pytest
 
 from scida import load
@@ -18,6 +20,86 @@ def test_fieldcontainer_aliasing():
     )  # if we write to the alias, the original entry should be set
 
 
+def test_fieldcontainer_keys():
+    fc = FieldContainer()
+    fc["a"] = da.zeros(3)
+    fc["uid"] = da.arange(3)
+    assert fc.keys() == ["a"]
+    assert fc.keys(withinternal=True) == ["a", "uid"]
+    fc["foo"] = da.zeros(3)
+    assert fc.keys() == ["a", "foo"]
+    fc.internals.append("foo")
+    assert fc.keys() == ["a"]
+    assert len(fc) == 1
+    fc.internals.remove("foo")
+    del fc["foo"]
+
+    @fc.register_field()
+    def b(data, **kwargs):
+        return data["a"] + 1
+
+    fc.add_container("c")
+    assert "b" in fc
+    assert "b" not in fc.keys(withrecipes=False)  # membership does not evaluate recipes
+    assert fc.keys() == ["a", "b", "c"]
+    assert fc.keys(withrecipes=False, withgroups=False) == ["a"]
+    fc["b"]  # instantiating the recipe adds a field
+    assert fc.keys(withrecipes=False, withgroups=False) == ["a", "b"]
+    assert list(fc) == ["a", "b", "c"]
+    assert "uid" in fc and "c" in fc and "d" not in fc
+    del fc["a"]
+    fc.remove_container("c")
+    assert fc.keys() == ["b"]
+    assert len(fc) == 1
+
+
+def test_fieldcontainer_dataframe():
+    ureg = pint.UnitRegistry()
+    fc = FieldContainer()
+    fc["ParticleIDs"] = da.arange(10, dtype="uint64", chunks=5) + 2**60
+    fc["Masses"] = ureg.Quantity(da.arange(10, dtype="float64", chunks=3), "g")
+    fc["Flag"] = da.arange(10, chunks=4) % 2 == 0
+    fc["X"] = da.random.random((10, 3), chunks=(4, 3))
+    fields = ["X", "ParticleIDs", "Masses", "Flag"]
+    ddf = fc.get_dataframe(fields=fields)
+    assert list(ddf.columns) == ["X0", "X1", "X2", "ParticleIDs", "Masses", "Flag"]
+    assert ddf["ParticleIDs"].dtype == np.uint64
+    assert ddf["Masses"].dtype == np.float64
+    assert ddf["Flag"].dtype == bool
+    df = ddf.compute()
+    assert np.all(df["ParticleIDs"].values == fc["ParticleIDs"].compute())
+    assert np.all(df["Masses"].values == fc["Masses"].magnitude.compute())
+    assert np.allclose(df[["X0", "X1", "X2"]].values, fc["X"].compute())
+
+    # fields with unknown chunk sizes (e.g. after masking) cannot be stacked
+    fc = FieldContainer()
+    x = da.arange(10, chunks=5.0)
+    fc["a"] = x[x > 3]
+    fc["b"] = (2 * x)[x > 3]
+    df = fc.get_dataframe(fields=["a", "b"]).compute()
+    assert np.all(df["a"].values == np.arange(4, 10))
+    assert np.all(df["b"].values == 2 * np.arange(4, 10))
+
+    # single columns of 2D fields, including names that contain digits themselves
+    fc = FieldContainer()
+    fc["X"] = da.random.random((10, 3), chunks=(4, 3))
+    fc["Coordinates"] = fc["X"]
+    fc["Group1Pos"] = fc["X"]
+    ddf = fc.get_dataframe(fields=["Coordinates1", "Group1Pos2"])
+    assert list(ddf.columns) == ["Coordinates1", "Group1Pos2"]
+    df = ddf.compute()
+    assert np.allclose(df["Coordinates1"].values, fc["X"][:, 1].compute())
+    assert np.allclose(df["Group1Pos2"].values, fc["X"][:, 2].compute())
+    with pytest.raises(ValueError):
+        fc.get_dataframe(fields=["Unknown"])
+    with pytest.raises(ValueError):
+        fc.get_dataframe(fields=["Coordinates3"])
+    with pytest.raises(ValueError, match="Field '123' not found"):
+        fc.get_dataframe(fields=["123"])  # all digits, must not loop forever
+    with pytest.raises(ValueError, match="Field 'Unknown1' not found"):
+        fc.get_dataframe(fields=["Unknown1"])
+
+
 @require_testdata_path("interface", only=["TNG50-4_snapshot"])
 def test_fieldtypes(testdatapath):
     from scida import load